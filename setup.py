@@ -0,0 +1,16 @@
+from setuptools import Extension, setup
+
+# Project metadata lives in pyproject.toml; this file only declares the C extension.
+# It is optional so installs without a compiler fall back to the runtime-built ctypes library.
+setup(
+    ext_modules=[
+        Extension(
+            "shm_ipc_lock._atomic",
+            sources=["src/shm_ipc_lock/_atomic.c"],
+            depends=["src/shm_ipc_lock/atomic_cas.c"],
+            # No -march=native here: wheels must run on any CPU of the target architecture
+            extra_compile_args=["-std=gnu11", "-O3", "-fno-plt", "-fvisibility=hidden"],
+            optional=True,
+        )
+    ]
+)
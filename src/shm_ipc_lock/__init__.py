@@ -1,4 +1,7 @@
+from .ipc_lock import LOCK_SIZE
 from .ipc_lock import ShmLock
+from .ipc_lock import ShmLockSet
 from .ipc_lock import build_c_shared_lib
+from .ipc_lock import get_include
 
-__all__ = ["ShmLock", "build_c_shared_lib"]
+__all__ = ["LOCK_SIZE", "ShmLock", "ShmLockSet", "build_c_shared_lib", "get_include"]
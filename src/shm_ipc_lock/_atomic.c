@@ -0,0 +1,280 @@
+/*
+ * CPython extension exposing the atomic lock primitives with METH_FASTCALL.
+ *
+ * Functions mirror the ctypes entry points of the runtime-built library (same names, same
+ * arguments, pointers passed as int addresses), so ShmLock can use either backend unchanged.
+ * The blocking acquire functions drop the GIL only after the uncontended attempt fails.
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+
+#include "atomic_cas.c"
+
+static int check_nargs(const char *name, Py_ssize_t nargs, Py_ssize_t expected) {
+    if (nargs != expected) {
+        PyErr_Format(PyExc_TypeError, "%s() takes exactly %zd arguments (%zd given)",
+                     name, expected, nargs);
+        return -1;
+    }
+    return 0;
+}
+
+static void *as_ptr(PyObject *obj) {
+    void *ptr = PyLong_AsVoidPtr(obj);
+    if (ptr == NULL && !PyErr_Occurred())
+        PyErr_SetString(PyExc_ValueError, "lock address must not be NULL");
+    return ptr;
+}
+
+static int as_u8(PyObject *obj, uint8_t *out) {
+    unsigned long v = PyLong_AsUnsignedLong(obj);
+    if (v == (unsigned long)-1 && PyErr_Occurred())
+        return -1;
+    if (v > 0xFF) {
+        PyErr_SetString(PyExc_OverflowError, "value does not fit in uint8");
+        return -1;
+    }
+    *out = (uint8_t)v;
+    return 0;
+}
+
+// Parses (base, stride, idx) and returns the lock at that index, NULL on error
+static shm_lock_t *as_lock_idx(PyObject *const *args) {
+    uint8_t *base = as_ptr(args[0]);
+    if (base == NULL)
+        return NULL;
+    size_t stride = PyLong_AsSize_t(args[1]);
+    if (stride == (size_t)-1 && PyErr_Occurred())
+        return NULL;
+    size_t idx = PyLong_AsSize_t(args[2]);
+    if (idx == (size_t)-1 && PyErr_Occurred())
+        return NULL;
+    return lock_at(base, stride, idx);
+}
+
+static PyObject *py_cas_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint8_t expected, desired;
+    if (check_nargs("cas_u8", nargs, 3) < 0)
+        return NULL;
+    uint8_t *ptr = as_ptr(args[0]);
+    if (ptr == NULL || as_u8(args[1], &expected) < 0 || as_u8(args[2], &desired) < 0)
+        return NULL;
+    return PyBool_FromLong(cas_u8(ptr, expected, desired));
+}
+
+static PyObject *py_store_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint8_t value;
+    if (check_nargs("store_u8", nargs, 2) < 0)
+        return NULL;
+    uint8_t *ptr = as_ptr(args[0]);
+    if (ptr == NULL || as_u8(args[1], &value) < 0)
+        return NULL;
+    store_u8(ptr, value);
+    Py_RETURN_NONE;
+}
+
+static PyObject *py_load_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("load_u8", nargs, 1) < 0)
+        return NULL;
+    uint8_t *ptr = as_ptr(args[0]);
+    if (ptr == NULL)
+        return NULL;
+    return PyLong_FromUnsignedLong(load_u8(ptr));
+}
+
+static PyObject *py_try_acquire_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("try_acquire_u8", nargs, 1) < 0)
+        return NULL;
+    uint8_t *ptr = as_ptr(args[0]);
+    if (ptr == NULL)
+        return NULL;
+    return PyBool_FromLong(try_acquire_u8(ptr));
+}
+
+static PyObject *py_try_lock_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("try_lock_u8", nargs, 1) < 0)
+        return NULL;
+    shm_lock_t *lock = as_ptr(args[0]);
+    if (lock == NULL)
+        return NULL;
+    return PyBool_FromLong(try_lock_u8(lock));
+}
+
+static PyObject *py_try_ts_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("try_ts_u8", nargs, 1) < 0)
+        return NULL;
+    uint8_t *ptr = as_ptr(args[0]);
+    if (ptr == NULL)
+        return NULL;
+    return PyBool_FromLong(try_ts_u8(ptr));
+}
+
+// Shared by the plain and indexed acquires: the caller parses the lock arguments and passes
+// the remaining (max_spins, deadline_ns, robust) in args. Returns the acquire_impl code as an
+// int (1, ACQUIRE_OWNER_DEAD or 0); ACQUIRE_AGAIN is handled here and never returned.
+static PyObject *acquire_lock(shm_lock_t *lock, PyObject *const *args, int use_xchg) {
+    unsigned long max_spins = PyLong_AsUnsignedLong(args[0]);
+    if (max_spins == (unsigned long)-1 && PyErr_Occurred())
+        return NULL;
+    unsigned long long deadline_ns = PyLong_AsUnsignedLongLong(args[1]);
+    if (deadline_ns == (unsigned long long)-1 && PyErr_Occurred())
+        return NULL;
+    int robust = PyObject_IsTrue(args[2]);
+    if (robust < 0)
+        return NULL;
+
+    // Uncontended fast path without touching the GIL
+    if (lock_try(lock, use_xchg))
+        return PyLong_FromLong(1);
+    int acquired;
+    for (;;) {
+        Py_BEGIN_ALLOW_THREADS
+        acquired = acquire_impl(lock, (uint32_t)max_spins, (uint64_t)deadline_ns, use_xchg,
+                                robust);
+        Py_END_ALLOW_THREADS
+        if (acquired != ACQUIRE_AGAIN)
+            break;
+        // Woken by a signal or the owner poll without the lock: let Ctrl-C & co. raise
+        if (PyErr_CheckSignals() < 0)
+            return NULL;
+    }
+    return PyLong_FromLong(acquired);
+}
+
+static PyObject *acquire_common(const char *name, PyObject *const *args, Py_ssize_t nargs,
+                                int use_xchg) {
+    if (check_nargs(name, nargs, 4) < 0)
+        return NULL;
+    shm_lock_t *lock = as_ptr(args[0]);
+    if (lock == NULL)
+        return NULL;
+    return acquire_lock(lock, args + 1, use_xchg);
+}
+
+static PyObject *acquire_idx_common(const char *name, PyObject *const *args, Py_ssize_t nargs,
+                                    int use_xchg) {
+    if (check_nargs(name, nargs, 6) < 0)
+        return NULL;
+    shm_lock_t *lock = as_lock_idx(args);
+    if (lock == NULL)
+        return NULL;
+    return acquire_lock(lock, args + 3, use_xchg);
+}
+
+static PyObject *py_acquire_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    return acquire_common("acquire_u8", args, nargs, 0);
+}
+
+static PyObject *py_acquire_ts_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    return acquire_common("acquire_ts_u8", args, nargs, 1);
+}
+
+static PyObject *py_acquire_u8_idx(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    return acquire_idx_common("acquire_u8_idx", args, nargs, 0);
+}
+
+static PyObject *py_acquire_ts_u8_idx(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    return acquire_idx_common("acquire_ts_u8_idx", args, nargs, 1);
+}
+
+static PyObject *py_release_u8(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("release_u8", nargs, 1) < 0)
+        return NULL;
+    shm_lock_t *lock = as_ptr(args[0]);
+    if (lock == NULL)
+        return NULL;
+    return PyBool_FromLong(release_u8(lock));
+}
+
+static PyObject *py_cas_u8_with_owner(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint8_t expected, desired;
+    if (check_nargs("cas_u8_with_owner", nargs, 4) < 0)
+        return NULL;
+    shm_lock_t *lock = as_ptr(args[0]);
+    if (lock == NULL || as_u8(args[1], &expected) < 0 || as_u8(args[2], &desired) < 0)
+        return NULL;
+    unsigned long owner_pid = PyLong_AsUnsignedLong(args[3]);
+    if (owner_pid == (unsigned long)-1 && PyErr_Occurred())
+        return NULL;
+    return PyBool_FromLong(cas_u8_with_owner(lock, expected, desired, (uint32_t)owner_pid));
+}
+
+static PyObject *py_cas_u8_idx(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    uint8_t expected, desired;
+    if (check_nargs("cas_u8_idx", nargs, 5) < 0)
+        return NULL;
+    shm_lock_t *lock = as_lock_idx(args);
+    if (lock == NULL || as_u8(args[3], &expected) < 0 || as_u8(args[4], &desired) < 0)
+        return NULL;
+    return PyBool_FromLong(cas_u8(&lock->flag, expected, desired));
+}
+
+static PyObject *py_load_u8_idx(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("load_u8_idx", nargs, 3) < 0)
+        return NULL;
+    shm_lock_t *lock = as_lock_idx(args);
+    if (lock == NULL)
+        return NULL;
+    return PyLong_FromUnsignedLong(load_u8(&lock->flag));
+}
+
+static PyObject *py_release_u8_idx(PyObject *self, PyObject *const *args, Py_ssize_t nargs) {
+    if (check_nargs("release_u8_idx", nargs, 3) < 0)
+        return NULL;
+    shm_lock_t *lock = as_lock_idx(args);
+    if (lock == NULL)
+        return NULL;
+    return PyBool_FromLong(release_u8(lock));
+}
+
+static PyMethodDef atomic_methods[] = {
+    {"cas_u8", (PyCFunction)(void (*)(void))py_cas_u8, METH_FASTCALL,
+     "cas_u8(addr, expected, desired) -> bool\nCompare-and-swap the byte at addr."},
+    {"store_u8", (PyCFunction)(void (*)(void))py_store_u8, METH_FASTCALL,
+     "store_u8(addr, value)\nAtomically store a byte at addr."},
+    {"load_u8", (PyCFunction)(void (*)(void))py_load_u8, METH_FASTCALL,
+     "load_u8(addr) -> int\nAtomically load the byte at addr (acquire ordering)."},
+    {"try_acquire_u8", (PyCFunction)(void (*)(void))py_try_acquire_u8, METH_FASTCALL,
+     "try_acquire_u8(addr) -> bool\nSingle test-then-CAS attempt on the flag at addr."},
+    {"try_lock_u8", (PyCFunction)(void (*)(void))py_try_lock_u8, METH_FASTCALL,
+     "try_lock_u8(addr) -> bool\n"
+     "Single acquire attempt on the lock at addr, recording the owner."},
+    {"try_ts_u8", (PyCFunction)(void (*)(void))py_try_ts_u8, METH_FASTCALL,
+     "try_ts_u8(addr) -> bool\nSingle test-and-set (xchg) attempt on the flag at addr."},
+    {"acquire_u8", (PyCFunction)(void (*)(void))py_acquire_u8, METH_FASTCALL,
+     "acquire_u8(addr, max_spins, deadline_ns, robust) -> int\n"
+     "Acquire the lock at addr (CAS): 1, 2 after taking over from a dead owner, 0 on timeout."},
+    {"acquire_ts_u8", (PyCFunction)(void (*)(void))py_acquire_ts_u8, METH_FASTCALL,
+     "acquire_ts_u8(addr, max_spins, deadline_ns, robust) -> int\n"
+     "Acquire the lock at addr (xchg); same results as acquire_u8."},
+    {"release_u8", (PyCFunction)(void (*)(void))py_release_u8, METH_FASTCALL,
+     "release_u8(addr) -> bool\nRelease the lock at addr (if owned) and wake one waiter."},
+    {"cas_u8_with_owner", (PyCFunction)(void (*)(void))py_cas_u8_with_owner, METH_FASTCALL,
+     "cas_u8_with_owner(addr, expected, desired, owner_pid) -> bool\n"
+     "CAS on the flag at addr, recording owner_pid on success."},
+    {"cas_u8_idx", (PyCFunction)(void (*)(void))py_cas_u8_idx, METH_FASTCALL,
+     "cas_u8_idx(base, stride, idx, expected, desired) -> bool\nCAS on the flag of lock idx."},
+    {"load_u8_idx", (PyCFunction)(void (*)(void))py_load_u8_idx, METH_FASTCALL,
+     "load_u8_idx(base, stride, idx) -> int\nAtomically load the flag of lock idx."},
+    {"acquire_u8_idx", (PyCFunction)(void (*)(void))py_acquire_u8_idx, METH_FASTCALL,
+     "acquire_u8_idx(base, stride, idx, max_spins, deadline_ns, robust) -> int\n"
+     "Acquire lock idx of a lock array (CAS); same results as acquire_u8."},
+    {"acquire_ts_u8_idx", (PyCFunction)(void (*)(void))py_acquire_ts_u8_idx, METH_FASTCALL,
+     "acquire_ts_u8_idx(base, stride, idx, max_spins, deadline_ns, robust) -> int\n"
+     "Acquire lock idx of a lock array (xchg); same results as acquire_u8."},
+    {"release_u8_idx", (PyCFunction)(void (*)(void))py_release_u8_idx, METH_FASTCALL,
+     "release_u8_idx(base, stride, idx) -> bool\nRelease lock idx of a lock array (if owned)."},
+    {NULL, NULL, 0, NULL}
+};
+
+static struct PyModuleDef atomic_module = {
+    PyModuleDef_HEAD_INIT,
+    "_atomic",
+    "Atomic shared-memory lock primitives (compiled ahead of time).",
+    -1,
+    atomic_methods
+};
+
+PyMODINIT_FUNC PyInit__atomic(void) {
+    return PyModule_Create(&atomic_module);
+}
@@ -0,0 +1,37 @@
+# Cython declarations for the lock primitives, for extensions that want to lock from nogil
+# code without any Python call. atomic_cas.c is compiled into the cimporting module, so add
+# shm_ipc_lock.get_include() to its include_dirs:
+#
+#     from shm_ipc_lock.atomic cimport try_acquire, acquire, release
+#
+# Addresses are those of ShmLock.ptr_addr, cast to uint8_t * / shm_lock_t *. Locks taken
+# here follow the same ownership rules as ShmLock, so either side may release them.
+# An address is only valid while its ShmLock is open, so keep the object alive meanwhile.
+
+from libc.stdint cimport uint8_t, uint32_t, uint64_t
+
+cdef extern from "atomic_cas.c" nogil:
+    ctypedef struct shm_lock_t:
+        uint8_t flag
+
+    uint8_t load_u8(uint8_t *ptr)
+    int try_lock_u8(shm_lock_t *lock)
+    int acquire_u8(shm_lock_t *lock, uint32_t max_spins, uint64_t deadline_ns, int robust)
+    int acquire_ts_u8(shm_lock_t *lock, uint32_t max_spins, uint64_t deadline_ns, int robust)
+    int release_u8(shm_lock_t *lock)
+
+cdef inline int try_acquire(uint8_t *p) noexcept nogil:
+    return try_lock_u8(<shm_lock_t *>p)
+
+# acquire_u8 returns -1 when a parked wait was cut short (signal or owner poll) so that Python
+# callers can handle signals; nogil code has nothing to check and simply retries. With robust
+# nonzero, 2 means the lock was taken over from a dead holder (see ShmLock's robust).
+cdef inline int acquire(uint8_t *p, uint32_t max_spins, uint64_t deadline_ns,
+                        int robust=0) noexcept nogil:
+    cdef int got = acquire_u8(<shm_lock_t *>p, max_spins, deadline_ns, robust)
+    while got < 0:
+        got = acquire_u8(<shm_lock_t *>p, max_spins, deadline_ns, robust)
+    return got
+
+cdef inline int release(uint8_t *p) noexcept nogil:
+    return release_u8(<shm_lock_t *>p)
@@ -0,0 +1,326 @@
+/*
+ * Atomic primitives for the shared-memory lock.
+ *
+ * Compiled at runtime into a ctypes-loadable library by build_c_shared_lib(), and included
+ * verbatim by the _atomic extension module, so both backends run the same code.
+ */
+#ifndef _GNU_SOURCE
+#define _GNU_SOURCE
+#endif
+#include <stddef.h>
+#include <stdint.h>
+#include <stdatomic.h>
+#include <time.h>
+#include <errno.h>
+#include <sched.h>
+#include <signal.h>
+#include <pthread.h>
+#include <unistd.h>
+#include <sys/syscall.h>
+#include <linux/futex.h>
+#if defined(__x86_64__) || defined(__i386__)
+#include <immintrin.h>
+#endif
+
+#ifdef __cplusplus
+extern "C" {
+#endif
+
+// Built with -fvisibility=hidden; only the entry points below are exported.
+#define SHM_EXPORT __attribute__((visibility("default")))
+
+// Use GCC/clang builtin for atomic compare-exchange for portability across compilers.
+SHM_EXPORT int cas_u8(uint8_t *ptr, uint8_t expected, uint8_t desired) {
+    // __atomic_compare_exchange_n returns true(1) on success, false(0) on failure.
+    return __atomic_compare_exchange_n(ptr, &expected, desired, 0, __ATOMIC_SEQ_CST, __ATOMIC_SEQ_CST);
+}
+
+SHM_EXPORT void store_u8(uint8_t *ptr, uint8_t value) {
+    __atomic_store_n(ptr, value, __ATOMIC_SEQ_CST);
+}
+
+// Acquire load: a single MOV on x86, but gives is_locked() real atomic semantics.
+SHM_EXPORT uint8_t load_u8(uint8_t *ptr) {
+    return __atomic_load_n(ptr, __ATOMIC_ACQUIRE);
+}
+
+static inline uint64_t now_ns(void) {
+    struct timespec ts;
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+    return (uint64_t)ts.tv_sec * 1000000000ull + (uint64_t)ts.tv_nsec;
+}
+
+// Per-thread xorshift32 state used to jitter the spin length, so waiters that started
+// together (a thundering herd after a release) drift apart instead of retrying in lockstep.
+static __thread uint32_t jitter_state;
+
+static inline uint32_t jitter_next(void) {
+    uint32_t x = jitter_state;
+    if (x == 0) {
+        x = (uint32_t)getpid() ^ (uint32_t)(uintptr_t)&jitter_state ^ (uint32_t)now_ns();
+        if (x == 0)
+            x = 0x9E3779B9u;
+    }
+    x ^= x << 13;
+    x ^= x >> 17;
+    x ^= x << 5;
+    jitter_state = x;
+    return x;
+}
+
+// Spin-wait hints issued between reads of the flag (Chromium uses a handful per iteration),
+// plus 0..15 extra from the jitter generator.
+#define PAUSES_PER_SPIN 4
+
+static inline void cpu_relax(void) {
+    uint32_t pauses = PAUSES_PER_SPIN + (jitter_next() & 0x0F);
+    for (uint32_t i = 0; i < pauses; i++) {
+#if defined(__x86_64__) || defined(__i386__)
+        _mm_pause();
+#elif defined(__aarch64__) || defined(__arm__)
+        __asm__ __volatile__("yield" ::: "memory");
+#endif
+    }
+}
+
+// Test-then-CAS: a relaxed load first, so a held lock only costs a shared read of the cache line.
+// Only when the flag looks free do we issue the locked RMW.
+SHM_EXPORT int try_acquire_u8(uint8_t *ptr) {
+    if (__atomic_load_n(ptr, __ATOMIC_RELAXED))
+        return 0;
+    uint8_t expected = 0;
+    return __atomic_compare_exchange_n(ptr, &expected, 1, 0, __ATOMIC_ACQUIRE, __ATOMIC_RELAXED);
+}
+
+// Test-and-set variant: after the same relaxed-load check, take the line with a single xchg,
+// which needs no compare. Depending on the micro-architecture this can shorten the hand-off.
+SHM_EXPORT int try_ts_u8(uint8_t *ptr) {
+    if (__atomic_load_n(ptr, __ATOMIC_RELAXED))
+        return 0;
+    return __atomic_exchange_n(ptr, 1, __ATOMIC_ACQUIRE) == 0;
+}
+
+// Shared lock layout: the flag byte stays at offset 0 so the plain u8 helpers keep working on it.
+// waiters counts processes parked in futex; seq is the futex word bumped by release to wake them
+// (futex needs an aligned 32-bit word, so the flag byte itself cannot be waited on).
+// owner is the pid of the holder (0 while free or while being handed over), used to refuse
+// releases from other processes and to recover locks whose holder died.
+// The struct fills a whole cache line so unrelated data never shares the line waiters spin on.
+#define CACHE_LINE 64
+
+typedef struct {
+    _Alignas(CACHE_LINE) uint8_t flag;
+    uint8_t _pad0[3];
+    uint32_t waiters;
+    uint32_t seq;
+    uint32_t owner;
+    char _pad[CACHE_LINE - 16];
+} shm_lock_t;
+
+_Static_assert(sizeof(shm_lock_t) == CACHE_LINE, "shm_lock_t layout must match LOCK_SIZE");
+
+// sched_yield() rounds between the spin phase and parking in futex.
+#define YIELD_ROUNDS 10
+
+// Parked waiters wake at least this often to return to the caller and, for robust acquires,
+// to check whether the owner died.
+#define OWNER_POLL_NS 100000000ull
+
+// Returned by the acquire functions when a parked waiter was interrupted by a signal or its
+// poll interval ran out: nothing is held, the caller handles pending signals and calls again.
+#define ACQUIRE_AGAIN (-1)
+
+// Returned by a robust acquire that took the lock over from a dead holder (like EOWNERDEAD
+// of a robust pthread mutex): the lock is held, but the data it protects may be half-updated.
+#define ACQUIRE_OWNER_DEAD 2
+
+// getpid() is a real syscall on current glibc, so the pid is cached and reset in fork children.
+static uint32_t cached_pid;
+
+static void reset_cached_pid(void) {
+    cached_pid = 0;
+}
+
+__attribute__((constructor)) static void register_pid_reset(void) {
+    pthread_atfork(NULL, NULL, reset_cached_pid);
+}
+
+static inline uint32_t current_pid(void) {
+    uint32_t pid = cached_pid;
+    if (pid == 0)
+        cached_pid = pid = (uint32_t)getpid();
+    return pid;
+}
+
+// Take over a lock whose recorded owner no longer exists. The flag stays 1; winning the CAS on
+// owner transfers it. A holder that died between setting flag and owner (owner still 0) cannot
+// be detected, an unreaped zombie still exists for kill(), and pids are only meaningful within
+// one pid namespace: a live holder in another namespace looks dead, which is why takeover is
+// opt-in (robust).
+static inline int try_recover(shm_lock_t *lock) {
+    uint32_t owner = __atomic_load_n(&lock->owner, __ATOMIC_ACQUIRE);
+    if (owner == 0 || owner == current_pid())
+        return 0;
+    if (kill((pid_t)owner, 0) == 0 || errno != ESRCH)
+        return 0;
+    return __atomic_compare_exchange_n(&lock->owner, &owner, current_pid(), 0,
+                                       __ATOMIC_ACQUIRE, __ATOMIC_RELAXED);
+}
+
+// The region is MAP_SHARED between processes, so the shared (non-PRIVATE) futex ops are required.
+static inline long futex_wait(uint32_t *addr, uint32_t val, const struct timespec *ts) {
+    return syscall(SYS_futex, addr, FUTEX_WAIT, val, ts, NULL, 0);
+}
+
+static inline long futex_wake(uint32_t *addr, int n) {
+    return syscall(SYS_futex, addr, FUTEX_WAKE, n, NULL, NULL, 0);
+}
+
+// One attempt on the flag; records this process as the owner on success.
+static inline int lock_try(shm_lock_t *lock, int use_xchg) {
+    if (!(use_xchg ? try_ts_u8(&lock->flag) : try_acquire_u8(&lock->flag)))
+        return 0;
+    __atomic_store_n(&lock->owner, current_pid(), __ATOMIC_RELAXED);
+    return 1;
+}
+
+// Single non-blocking acquire attempt that records ownership like acquire_u8, so the lock
+// can later be released by release_u8 (used by the Numba and Cython bindings).
+SHM_EXPORT int try_lock_u8(shm_lock_t *lock) {
+    return lock_try(lock, 0);
+}
+
+// Flag CAS that also records owner_pid on success, for callers managing ownership themselves.
+SHM_EXPORT int cas_u8_with_owner(shm_lock_t *lock, uint8_t expected, uint8_t desired,
+                                 uint32_t owner_pid) {
+    if (!__atomic_compare_exchange_n(&lock->flag, &expected, desired, 0,
+                                     __ATOMIC_SEQ_CST, __ATOMIC_SEQ_CST))
+        return 0;
+    __atomic_store_n(&lock->owner, owner_pid, __ATOMIC_RELAXED);
+    return 1;
+}
+
+// Acquire the flag (0 -> 1) with the whole backoff ladder in C, so the caller pays a single
+// foreign call per acquire: spin max_spins times with PAUSE, then sched_yield() YIELD_ROUNDS
+// times, then park in futex until release() wakes us. deadline_ns is an absolute
+// CLOCK_MONOTONIC time (the clock behind Python's time.monotonic_ns()); 0 waits forever.
+// use_xchg selects try_ts_u8 over try_acquire_u8 for every attempt. With robust set, a parked
+// waiter whose OWNER_POLL_NS wait runs out checks whether the owner process has died and
+// takes the lock over (see try_recover); the kill() probe is kept off the contended path.
+// Returns 1 on success, ACQUIRE_OWNER_DEAD after a takeover, 0 on timeout and ACQUIRE_AGAIN
+// when the futex wait was interrupted by a signal or hit OWNER_POLL_NS, so that an untimed
+// acquire still returns to the caller (and Python can run its signal handlers, e.g. raise
+// KeyboardInterrupt) at least that often.
+static inline int acquire_impl(shm_lock_t *lock, uint32_t max_spins, uint64_t deadline_ns,
+                               int use_xchg, int robust) {
+    if (lock_try(lock, use_xchg))
+        return 1;
+    for (uint32_t i = 0; i < max_spins; i++) {
+        cpu_relax();
+        if (lock_try(lock, use_xchg))
+            return 1;
+    }
+    for (int i = 0; i < YIELD_ROUNDS; i++) {
+        if (deadline_ns && now_ns() >= deadline_ns)
+            return 0;
+        sched_yield();
+        if (lock_try(lock, use_xchg))
+            return 1;
+    }
+
+    int acquired = 0;
+    __atomic_fetch_add(&lock->waiters, 1, __ATOMIC_SEQ_CST);
+    for (;;) {
+        // Read seq before re-checking the flag: a release in between bumps seq and the
+        // futex_wait below returns immediately instead of missing the wake-up.
+        uint32_t seq = __atomic_load_n(&lock->seq, __ATOMIC_ACQUIRE);
+        __atomic_thread_fence(__ATOMIC_SEQ_CST);
+        if (lock_try(lock, use_xchg)) {
+            acquired = 1;
+            break;
+        }
+        uint64_t wait_ns = OWNER_POLL_NS;
+        if (deadline_ns) {
+            uint64_t now = now_ns();
+            if (now >= deadline_ns)
+                break;
+            if (deadline_ns - now < wait_ns)
+                wait_ns = deadline_ns - now;
+        }
+        struct timespec ts = { (time_t)(wait_ns / 1000000000ull), (long)(wait_ns % 1000000000ull) };
+        if (futex_wait(&lock->seq, seq, &ts) == -1 && (errno == EINTR || errno == ETIMEDOUT)) {
+            if (errno == ETIMEDOUT && robust && try_recover(lock))
+                acquired = ACQUIRE_OWNER_DEAD;
+            else
+                acquired = ACQUIRE_AGAIN;
+            break;
+        }
+    }
+    __atomic_fetch_sub(&lock->waiters, 1, __ATOMIC_SEQ_CST);
+    return acquired;
+}
+
+SHM_EXPORT int acquire_u8(shm_lock_t *lock, uint32_t max_spins, uint64_t deadline_ns,
+                          int robust) {
+    return acquire_impl(lock, max_spins, deadline_ns, 0, robust);
+}
+
+SHM_EXPORT int acquire_ts_u8(shm_lock_t *lock, uint32_t max_spins, uint64_t deadline_ns,
+                             int robust) {
+    return acquire_impl(lock, max_spins, deadline_ns, 1, robust);
+}
+
+// Release the flag and wake one parked waiter, if any. Only the owning process may release;
+// returns 0 (and changes nothing) otherwise. The seq_cst store orders the flag clear before
+// the waiters load (store->load), pairing with the fence in acquire_u8.
+// A waiter killed while parked never decrements waiters, so from then on every release of
+// that lock pays the seq bump and a futex_wake syscall that wakes nobody. This is not reset
+// here when futex_wake returns 0: a live waiter between its increment and futex_wait looks
+// exactly the same, and dropping its count would leave it asleep until its next owner poll.
+// The count is only a wake-up hint, so correctness is unaffected; recreating the region
+// (no process using it) clears it.
+SHM_EXPORT int release_u8(shm_lock_t *lock) {
+    if (!__atomic_load_n(&lock->flag, __ATOMIC_RELAXED) ||
+        __atomic_load_n(&lock->owner, __ATOMIC_RELAXED) != current_pid())
+        return 0;
+    __atomic_store_n(&lock->owner, 0, __ATOMIC_RELAXED);
+    __atomic_store_n(&lock->flag, 0, __ATOMIC_SEQ_CST);
+    if (__atomic_load_n(&lock->waiters, __ATOMIC_SEQ_CST)) {
+        __atomic_fetch_add(&lock->seq, 1, __ATOMIC_SEQ_CST);
+        futex_wake(&lock->seq, 1);
+    }
+    return 1;
+}
+
+// Lock-array API: `count` locks laid out every `stride` bytes from `base` (one region, one
+// mapping). The caller keeps only the base address and passes the index.
+static inline shm_lock_t *lock_at(uint8_t *base, size_t stride, size_t idx) {
+    return (shm_lock_t *)(base + stride * idx);
+}
+
+SHM_EXPORT int cas_u8_idx(uint8_t *base, size_t stride, size_t idx, uint8_t expected,
+                          uint8_t desired) {
+    return cas_u8(&lock_at(base, stride, idx)->flag, expected, desired);
+}
+
+SHM_EXPORT uint8_t load_u8_idx(uint8_t *base, size_t stride, size_t idx) {
+    return load_u8(&lock_at(base, stride, idx)->flag);
+}
+
+SHM_EXPORT int acquire_u8_idx(uint8_t *base, size_t stride, size_t idx, uint32_t max_spins,
+                              uint64_t deadline_ns, int robust) {
+    return acquire_impl(lock_at(base, stride, idx), max_spins, deadline_ns, 0, robust);
+}
+
+SHM_EXPORT int acquire_ts_u8_idx(uint8_t *base, size_t stride, size_t idx, uint32_t max_spins,
+                                 uint64_t deadline_ns, int robust) {
+    return acquire_impl(lock_at(base, stride, idx), max_spins, deadline_ns, 1, robust);
+}
+
+SHM_EXPORT int release_u8_idx(uint8_t *base, size_t stride, size_t idx) {
+    return release_u8(lock_at(base, stride, idx));
+}
+
+#ifdef __cplusplus
+}
+#endif
@@ -1,9 +1,8 @@
 import os
 import time
-import tempfile
 from multiprocessing import Process
 
-from shm_ipc_lock import ShmLock, build_c_shared_lib
+from shm_ipc_lock import LOCK_SIZE, ShmLock
 
 """
 Demo script for the IPC spinlock with shared memory offset.
@@ -23,13 +22,12 @@ def worker(name, offset, so_path, worker_id, hold_time):
 
 def main():
     shm_path = "/dev/shm/ipc_region_demo"
-    offset = 128  # place the lock flag at byte offset 128
-    tmpdir = tempfile.mkdtemp(prefix="ipc_demo_")
-    so_path = build_c_shared_lib(tmpdir)
+    offset = 128  # place the lock at byte offset 128
+    so_path = None  # compiled extension if installed, else the runtime-built ctypes library
 
     # Create a shared memory region large enough
     fd = os.open(shm_path, os.O_RDWR | os.O_CREAT, 0o600)
-    os.ftruncate(fd, offset + 1)
+    os.ftruncate(fd, offset + LOCK_SIZE)
     os.close(fd)
 
     print(f"Shared memory: {shm_path} (flag at offset {offset})")
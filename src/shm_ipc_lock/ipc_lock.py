@@ -1,90 +1,246 @@
 #!/usr/bin/env python3
 """
 IPC spin-lock using a 1-byte flag in POSIX shared memory (/dev/shm) + CAS (compare-and-swap).
-This script compiles a tiny C shared library at runtime that exposes atomic CAS and atomic store
-for a uint8_t pointer, and uses ctypes to call it on the mmap'ed shared memory.
+The atomic primitives live in atomic_cas.c. When the package was installed with its compiled
+_atomic extension they are called through METH_FASTCALL; otherwise this module compiles the
+same source into a tiny shared library at runtime (cached under ~/.cache/shm_ipc_lock) and
+calls it on the mmap'ed shared memory through ctypes.
 """
 
 import os
-import tempfile
 import mmap
+import fcntl
 import ctypes
+import functools
+import hashlib
+import platform
 import subprocess
 import time
+import weakref
+
+try:
+    from . import _atomic
+except ImportError:  # extension not built; fall back to the runtime-compiled library
+    _atomic = None
 
 # ---------- C code for atomic CAS and store ----------
-C_CODE = r'''
-#include <stdint.h>
-#include <stdatomic.h>
-
-#ifdef __cplusplus
-extern "C" {
-#endif
-
-// Use GCC/clang builtin for atomic compare-exchange for portability across compilers.
-int cas_u8(uint8_t *ptr, uint8_t expected, uint8_t desired) {
-    // __atomic_compare_exchange_n returns true(1) on success, false(0) on failure.
-    return __atomic_compare_exchange_n(ptr, &expected, desired, 0, __ATOMIC_SEQ_CST, __ATOMIC_SEQ_CST);
-}
-
-void store_u8(uint8_t *ptr, uint8_t value) {
-    __atomic_store_n(ptr, value, __ATOMIC_SEQ_CST);
-}
-
-#ifdef __cplusplus
-}
-#endif
-'''
-
-def build_c_shared_lib(tmpdir: str):
-    """Write C code and compile a shared object. Returns path to .so"""
-    c_path = os.path.join(tmpdir, "atomic_cas.c")
-    so_path = os.path.join(tmpdir, "libatomic_cas.so")
-    with open(c_path, "w") as f:
-        f.write(C_CODE)
-    # Compile with gcc
-    cmd = ["gcc", "-std=gnu11", "-shared", "-fPIC", "-O2", c_path, "-o", so_path]
-    subprocess.check_call(cmd)
+# Shipped as atomic_cas.c next to this module (also compiled into the _atomic extension)
+with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "atomic_cas.c")) as _f:
+    C_CODE = _f.read()
+
+# Compiler flags; part of the cache key together with the C source, gcc version and CPU.
+# -fno-plt and -fvisibility=hidden keep the exported entry points free of PLT indirection.
+CFLAGS = [
+    "-std=gnu11", "-shared", "-fPIC", "-pthread", "-O3", "-march=native", "-fno-plt",
+    "-fvisibility=hidden",
+]
+
+def _cpu_flags() -> bytes:
+    """CPU feature flags, so a cached -march=native build is never loaded on another CPU."""
+    try:
+        with open("/proc/cpuinfo", "rb") as f:
+            for line in f:
+                if line.startswith((b"flags", b"Features")):
+                    return line
+    except OSError:
+        pass
+    return platform.machine().encode()
+
+def _default_cache_dir() -> str:
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "shm_ipc_lock")
+
+@functools.lru_cache(maxsize=None)
+def _build_key() -> str:
+    """
+    Hash of the C source, compiler flags, gcc version and CPU naming the cached .so. Computed
+    once per process: it runs gcc --version and reads /proc/cpuinfo, neither of which changes
+    while the process lives.
+    """
+    gcc_version = subprocess.check_output(["gcc", "--version"])
+    key = hashlib.sha256(
+        C_CODE.encode() + " ".join(CFLAGS).encode() + gcc_version + _cpu_flags()
+    )
+    return key.hexdigest()[:16]
+
+def build_c_shared_lib(build_dir: str = None):
+    """
+    Compile C_CODE into a shared object and return its path.
+
+    The .so is named after a hash of the C source, compiler flags, gcc version and CPU, so an
+    existing build in build_dir (default: ~/.cache/shm_ipc_lock) is reused instead of
+    recompiling in every process. Concurrent builders serialize on a lock file.
+    """
+    if build_dir is None:
+        build_dir = _default_cache_dir()
+    so_path = os.path.join(build_dir, f"libatomic_cas.{_build_key()}.so")
+    if os.path.exists(so_path):
+        return so_path
+
+    os.makedirs(build_dir, exist_ok=True)
+
+    with open(so_path + ".lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        # Another process may have finished the build while we waited for the lock
+        if os.path.exists(so_path):
+            return so_path
+        c_path = os.path.join(build_dir, f"atomic_cas.{os.getpid()}.c")
+        tmp_so_path = f"{so_path}.{os.getpid()}.tmp"
+        try:
+            with open(c_path, "w") as f:
+                f.write(C_CODE)
+            # Compile with gcc, then publish atomically so readers never see a partial file
+            subprocess.check_call(["gcc", *CFLAGS, c_path, "-o", tmp_so_path])
+            os.replace(tmp_so_path, so_path)
+        finally:
+            for path in (c_path, tmp_so_path):
+                if os.path.exists(path):
+                    os.remove(path)
     return so_path
 
-# ---------- IPC Spinlock class ----------
-class ShmLock:
+@functools.lru_cache(maxsize=None)
+def _load_ctypes_lib(so_path: str):
     """
-    Inter-process spinlock using a flag byte at a specific offset in shared memory.
-    If shared memory file does not exist and create=True, it will be created.
+    Load the runtime-built library and declare its signatures, once per path and process;
+    every ShmLock on the same library shares the function objects. Only the blocking
+    acquires release the GIL (CDLL); every other entry point returns at once and is called
+    through PyDLL, which keeps the GIL, so no thread can be inside them while close() unmaps.
+    """
+    lib = ctypes.PyDLL(so_path)
+    blocking = ctypes.CDLL(so_path)
+    for name in ("acquire_u8", "acquire_ts_u8", "acquire_u8_idx", "acquire_ts_u8_idx"):
+        setattr(lib, name, getattr(blocking, name))
+    # Pointers are passed as c_void_p so a plain int address marshals without coercion
+    lib.cas_u8.argtypes = (ctypes.c_void_p, ctypes.c_uint8, ctypes.c_uint8)
+    lib.cas_u8.restype = ctypes.c_int
+    lib.store_u8.argtypes = (ctypes.c_void_p, ctypes.c_uint8)
+    lib.store_u8.restype = None
+    lib.load_u8.argtypes = (ctypes.c_void_p,)
+    lib.load_u8.restype = ctypes.c_uint8
+    lib.try_acquire_u8.argtypes = (ctypes.c_void_p,)
+    lib.try_acquire_u8.restype = ctypes.c_int
+    lib.acquire_u8.argtypes = (ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint64, ctypes.c_int)
+    lib.acquire_u8.restype = ctypes.c_int
+    lib.try_ts_u8.argtypes = (ctypes.c_void_p,)
+    lib.try_ts_u8.restype = ctypes.c_int
+    lib.acquire_ts_u8.argtypes = (
+        ctypes.c_void_p, ctypes.c_uint32, ctypes.c_uint64, ctypes.c_int
+    )
+    lib.acquire_ts_u8.restype = ctypes.c_int
+    lib.try_lock_u8.argtypes = (ctypes.c_void_p,)
+    lib.try_lock_u8.restype = ctypes.c_int
+    lib.release_u8.argtypes = (ctypes.c_void_p,)
+    lib.release_u8.restype = ctypes.c_int
+    lib.cas_u8_with_owner.argtypes = (
+        ctypes.c_void_p, ctypes.c_uint8, ctypes.c_uint8, ctypes.c_uint32
+    )
+    lib.cas_u8_with_owner.restype = ctypes.c_int
+    # Lock-array entry points: (base, stride, idx, ...)
+    idx_args = (ctypes.c_void_p, ctypes.c_size_t, ctypes.c_size_t)
+    lib.cas_u8_idx.argtypes = idx_args + (ctypes.c_uint8, ctypes.c_uint8)
+    lib.cas_u8_idx.restype = ctypes.c_int
+    lib.load_u8_idx.argtypes = idx_args
+    lib.load_u8_idx.restype = ctypes.c_uint8
+    lib.acquire_u8_idx.argtypes = idx_args + (ctypes.c_uint32, ctypes.c_uint64, ctypes.c_int)
+    lib.acquire_u8_idx.restype = ctypes.c_int
+    lib.acquire_ts_u8_idx.argtypes = idx_args + (ctypes.c_uint32, ctypes.c_uint64, ctypes.c_int)
+    lib.acquire_ts_u8_idx.restype = ctypes.c_int
+    lib.release_u8_idx.argtypes = idx_args
+    lib.release_u8_idx.restype = ctypes.c_int
+    return lib
 
-    Args:
-        shm_path (str): Path to shared memory file, e.g. /dev/shm/myregion
-        offset (int): Byte offset in shared memory to use for the flag
-        create (bool): If True, create file if it doesn't exist
-        so_path (str): Optional path to prebuilt atomic CAS .so
+# Number of PAUSE spin iterations made in C before yielding and then parking in futex
+SPIN_BUDGET = 40
+
+# ACQUIRE_AGAIN from atomic_cas.c: a parked ctypes acquire returned (signal or owner poll)
+# without the lock so that Python gets to run signal handlers; the caller simply retries.
+# The extension retries internally and only ever returns True or False.
+_ACQUIRE_AGAIN = -1
+# ACQUIRE_OWNER_DEAD: a robust acquire took the lock over from a holder that died
+_ACQUIRE_OWNER_DEAD = 2
+
+# Bytes used by the C shm_lock_t (flag, waiters count, futex sequence) at the lock offset.
+# It is padded to one full cache line to avoid false sharing with neighbouring data.
+CACHE_LINE = 64
+LOCK_SIZE = CACHE_LINE
+
+def _finalize_lock(release, addr, held, buf):
+    """Release the lock if it was acquired through this ShmLock (buf pins the map)."""
+    if held[0]:
+        release(addr)
+
+def _finalize_lock_set(release, base_addr, held, buf):
+    """Release every lock of a ShmLockSet that was acquired through it."""
+    for i, h in enumerate(held):
+        if h:
+            release(base_addr, LOCK_SIZE, i)
+
+def _closed(*args):
+    """Stands in for the bound C functions after close(), whose addresses are unmapped."""
+    raise ValueError("lock is closed")
+
+_libc = None
+
+def _mlock(addr: int, length: int) -> bool:
+    """Best-effort mlock() of the pages covering [addr, addr + length). Returns success."""
+    global _libc
+    try:
+        if _libc is None:
+            _libc = ctypes.CDLL(None, use_errno=True)
+            _libc.mlock.argtypes = (ctypes.c_void_p, ctypes.c_size_t)
+            _libc.mlock.restype = ctypes.c_int
+        start = addr & ~(mmap.PAGESIZE - 1)
+        return _libc.mlock(start, addr + length - start) == 0
+    except (OSError, AttributeError):
+        return False
+
+def get_include() -> str:
+    """Directory containing atomic_cas.c, for C/Cython code that cimports shm_ipc_lock.atomic."""
+    return os.path.dirname(os.path.abspath(__file__))
+
+def _deadline_ns(timeout) -> int:
     """
-    def __init__(
-        self,
-        shm_path: str,
-        offset: int = 0,
-        create: bool = True,
-        so_path: str = None
-    ):
+    Convert an acquire timeout in seconds to the absolute monotonic deadline passed to C
+    (0 means wait forever). The C loop compares against the same CLOCK_MONOTONIC, so Python
+    reads the clock once per acquire and wall-clock jumps cannot affect the timeout.
+    """
+    return time.monotonic_ns() + max(1, int(timeout * 1_000_000_000)) if timeout else 0
+
+class _ShmRegion:
+    """Shared-memory mapping plus the atomic library, common to ShmLock and ShmLockSet."""
+    def __init__(self, shm_path: str, offset: int, size: int, create: bool, so_path: str):
+        if offset % CACHE_LINE:
+            aligned = self.aligned_offset(offset)
+            raise ValueError(
+                f"Lock offset {offset} must be a multiple of {CACHE_LINE}, "
+                f"e.g. {type(self).__name__}.aligned_offset({offset}) == {aligned}"
+            )
         self.shm_path = shm_path
         self.offset = offset
-        self.size = offset + 1  # we need at least 1 byte past the offset
+        self.size = size
         self._ensure_shm_file(create)
         self.mm = self._open_mmap()
 
-        # Build or load atomic CAS library
-        if so_path is None:
-            tmpdir = tempfile.mkdtemp(prefix="ipc_cas_")
-            so_path = build_c_shared_lib(tmpdir)
-        self.lib = ctypes.CDLL(so_path)
-        self.lib.cas_u8.argtypes = (ctypes.POINTER(ctypes.c_uint8), ctypes.c_uint8, ctypes.c_uint8)
-        self.lib.cas_u8.restype = ctypes.c_int
-        self.lib.store_u8.argtypes = (ctypes.POINTER(ctypes.c_uint8), ctypes.c_uint8)
-        self.lib.store_u8.restype = None
+        # Prefer the compiled extension; build or load the ctypes library otherwise
+        if so_path is None and _atomic is not None:
+            self.lib = _atomic
+        else:
+            self.lib = _load_ctypes_lib(so_path or build_c_shared_lib())
 
-        # Get pointer to the byte at the specified offset
-        buf = (ctypes.c_uint8 * 1).from_buffer(self.mm, self.offset)
-        self.ptr = ctypes.cast(buf, ctypes.POINTER(ctypes.c_uint8))
+        # Address of the locks at the specified offset; _buf keeps the mmap export alive
+        self._buf = (ctypes.c_uint8 * (size - offset)).from_buffer(self.mm, self.offset)
+        self.ptr_addr = ctypes.addressof(self._buf)
+        self._pin_region()
+        # Set by subclasses: releases the locks acquired through this object on close() or GC
+        self._finalizer = None
+        # One entry per acquire() running in C (GIL released) on this object; close() must
+        # not unmap the region under them
+        self._in_flight = []
+
+    @staticmethod
+    def aligned_offset(desired: int) -> int:
+        """Round an offset up to the next cache-line boundary usable for a lock."""
+        return (desired + CACHE_LINE - 1) // CACHE_LINE * CACHE_LINE
 
     def _ensure_shm_file(self, create: bool):
         """Ensure shared memory file exists and is large enough."""
@@ -95,44 +251,235 @@ class ShmLock:
             if st.st_size < self.size:
                 if not create:
                     raise ValueError(f"Shared memory {self.shm_path} too small for offset {self.offset}")
-                os.ftruncate(fd, self.size)
-                os.lseek(fd, 0, os.SEEK_SET)
+                os.ftruncate(fd, self.size)  # zero-fills the extension, no write needed
         finally:
             os.close(fd)
 
     def _open_mmap(self):
-        fd = os.open(self.shm_path, os.O_RDWR)
+        # The mapping keeps its own reference, so the file can be closed right away
+        with open(self.shm_path, "r+b") as f:
+            return mmap.mmap(
+                f.fileno(), self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE
+            )
+
+    def _pin_region(self):
+        """
+        Keep the lock pages resident (mlock) so an acquire never page-faults mid critical
+        section. Best effort: mlock can fail under RLIMIT_MEMLOCK (or need CAP_IPC_LOCK on old
+        kernels), in which case the locks still work, just unpinned. Sets self.pinned to
+        whether mlock succeeded.
+        """
+        self.pinned = _mlock(self.ptr_addr, self.size - self.offset)
+
+    def close(self):
+        """
+        Release any lock acquired through this object and unmap the region. Later calls on
+        the object raise ValueError, like a closed mmap. Raises RuntimeError, leaving the
+        object open, while another thread is blocked in acquire() on it.
+        """
+        if self._in_flight:
+            raise RuntimeError(
+                f"Cannot close {self.shm_path} while another thread is blocked in acquire()"
+            )
+        if self._finalizer is not None:
+            self._finalizer()
+        # The bound functions take raw addresses into the mapping, so they must not outlive it
+        self._acquire = self._release = self._load = _closed
+        # Drop the ctypes view first, otherwise mmap.close() fails with exported pointers
+        self._buf = None
         try:
-            return mmap.mmap(fd, self.size, mmap.MAP_SHARED, mmap.PROT_READ | mmap.PROT_WRITE)
-        finally:
-            os.close(fd)
+            self.mm.close()
+        except Exception:
+            pass
+
+# ---------- IPC Spinlock class ----------
+class ShmLock(_ShmRegion):
+    """
+    Inter-process spinlock using a flag byte at a specific offset in shared memory.
+    If shared memory file does not exist and create=True, it will be created.
+    Waiters spin briefly, then yield, then sleep in futex. The lock occupies one full cache line
+    (LOCK_SIZE bytes, flag byte first) at the offset, which must be 64-byte aligned; the bytes
+    after the flag are reserved and must not be used for other data.
+
+    Ownership is per process: the holder's pid is recorded next to the flag and release()
+    from a process that does not hold the lock raises RuntimeError. A lock acquired through
+    this object and still held when it is closed or garbage collected is released; other
+    ShmLock objects on the same lock, e.g. a short-lived one checking is_locked(), leave it
+    alone. A waiter killed while sleeping stays counted as a waiter, so later releases of
+    that lock make one futex_wake syscall each until the region is recreated.
+
+    With robust=True, a waiter also takes over a lock whose holder process has died, within
+    about 100 ms of parking; acquire() still returns True and owner_died tells the caller
+    that the protected data may be half-updated. Liveness is checked with kill(pid, 0), so:
+    all processes must share one pid namespace (a live holder in another container sharing
+    /dev/shm looks dead and would lose the lock), a dead holder is only detected once its
+    parent has reaped it, and a new process reusing its pid keeps the lock from recovering.
+    Without robust, the lock of a dead holder stays held, as with a plain spinlock.
+
+    Args:
+        shm_path (str): Path to shared memory file, e.g. /dev/shm/myregion
+        offset (int): Byte offset in shared memory to use for the lock (multiple of 64,
+            see aligned_offset())
+        create (bool): If True, create file if it doesn't exist
+        so_path (str): Optional path to prebuilt atomic CAS .so; forces the ctypes backend
+        exchange (bool): If True, acquire with xchg (test-and-set) instead of CAS; which one
+            is faster depends on the CPU and the contention pattern
+        robust (bool): If True, take over locks whose holder process died (see above)
+    """
+    def __init__(
+        self,
+        shm_path: str,
+        offset: int = 0,
+        create: bool = True,
+        so_path: str = None,
+        exchange: bool = False,
+        robust: bool = False
+    ):
+        super().__init__(shm_path, offset, offset + LOCK_SIZE, create, so_path)
+        # Bound once so acquire/release skip the self.lib / self.ptr_addr attribute lookups
+        self._acquire = self.lib.acquire_ts_u8 if exchange else self.lib.acquire_u8
+        self._release = self.lib.release_u8
+        self._load = self.lib.load_u8
+        self._addr = self.ptr_addr
+        self._robust = int(robust)
+        # Nonzero while this object holds the lock (_ACQUIRE_OWNER_DEAD after a takeover),
+        # shared with the finalizer (which cannot use self)
+        self._held = bytearray(1)
+        self._finalizer = weakref.finalize(
+            self, _finalize_lock, self._release, self._addr, self._held, self._buf
+        )
 
     def acquire(self, timeout=None):
         """
-        Try to acquire lock (0 -> 1). Returns True on success, False on timeout.
+        Try to acquire lock (0 -> 1). Returns True on success, False on timeout; after a
+        robust takeover from a dead holder, owner_died is True until release().
         """
-        start = time.time()
-        backoff = 0.00001
-        while True:
-            res = self.lib.cas_u8(self.ptr, ctypes.c_uint8(0), ctypes.c_uint8(1))
-            if res:
-                return True
-            if timeout and (time.time() - start) >= timeout:
-                return False
-            time.sleep(backoff)
-            backoff = min(0.01, backoff * 2)
+        deadline = _deadline_ns(timeout)
+        self._in_flight.append(None)
+        try:
+            got = self._acquire(self._addr, SPIN_BUDGET, deadline, self._robust)
+            while got == _ACQUIRE_AGAIN:
+                got = self._acquire(self._addr, SPIN_BUDGET, deadline, self._robust)
+        finally:
+            self._in_flight.pop()
+        if got:
+            self._held[0] = got
+        return bool(got)
 
     def release(self):
-        """Release the lock by atomically storing 0."""
-        self.lib.store_u8(self.ptr, ctypes.c_uint8(0))
+        """Release the lock by atomically storing 0 and waking one sleeping waiter."""
+        if not self._release(self._addr):
+            raise RuntimeError(f"Lock at {self.shm_path}:{self.offset} is not held by this process")
+        self._held[0] = 0
 
     def is_locked(self):
-        """Check if flag is nonzero (non-atomic read - best effort)."""
-        self.mm.seek(self.offset)
-        return self.mm.read(1) != b'\x00'
+        """Check if flag is nonzero (atomic acquire load)."""
+        return bool(self._load(self._addr))
 
-    def close(self):
+    @property
+    def owner_died(self):
+        """True while this object holds a lock it took over from a dead holder (robust=True)."""
+        return self._held[0] == _ACQUIRE_OWNER_DEAD
+
+    def __enter__(self):
+        # Same as acquire() with no timeout, calling the bound function directly
+        self._in_flight.append(None)
         try:
-            self.mm.close()
-        except Exception:
-            pass
+            got = self._acquire(self._addr, SPIN_BUDGET, 0, self._robust)
+            while got == _ACQUIRE_AGAIN:
+                got = self._acquire(self._addr, SPIN_BUDGET, 0, self._robust)
+        finally:
+            self._in_flight.pop()
+        if not got:
+            raise TimeoutError(f"Could not acquire lock at {self.shm_path}:{self.offset}")
+        self._held[0] = got
+        return self
+
+    def __exit__(self, *exc_info):
+        if not self._release(self._addr):
+            raise RuntimeError(f"Lock at {self.shm_path}:{self.offset} is not held by this process")
+        self._held[0] = 0
+
+# ---------- Lock array in one region ----------
+class ShmLockSet(_ShmRegion):
+    """
+    A fixed number of inter-process locks packed into one shared memory region.
+    Lock i occupies its own cache line at offset + i * LOCK_SIZE, so applications needing many
+    locks pay for one file, one mmap and one library load instead of one per lock.
+    Each lock has the same ownership, close/GC and robust rules as ShmLock.
+
+    Args:
+        shm_path (str): Path to shared memory file, e.g. /dev/shm/myregion
+        count (int): Number of locks in the set
+        offset (int): Byte offset of lock 0 in shared memory (multiple of 64)
+        create (bool): If True, create file if it doesn't exist
+        so_path (str): Optional path to prebuilt atomic CAS .so; forces the ctypes backend
+        exchange (bool): If True, acquire with xchg (test-and-set) instead of CAS
+        robust (bool): If True, take over locks whose holder process died
+    """
+    def __init__(
+        self,
+        shm_path: str,
+        count: int,
+        offset: int = 0,
+        create: bool = True,
+        so_path: str = None,
+        exchange: bool = False,
+        robust: bool = False
+    ):
+        if count < 1:
+            raise ValueError(f"Lock count must be positive, got {count}")
+        super().__init__(shm_path, offset, offset + count * LOCK_SIZE, create, so_path)
+        self.count = count
+        self._acquire = self.lib.acquire_ts_u8_idx if exchange else self.lib.acquire_u8_idx
+        self._release = self.lib.release_u8_idx
+        self._load = self.lib.load_u8_idx
+        self._base_addr = self.ptr_addr
+        self._robust = int(robust)
+        # Per-index flags of the locks held through this object, shared with the finalizer
+        self._held = bytearray(count)
+        self._finalizer = weakref.finalize(
+            self, _finalize_lock_set, self._release, self._base_addr, self._held, self._buf
+        )
+
+    def _check_index(self, i: int):
+        if not 0 <= i < self.count:
+            raise IndexError(f"Lock index {i} out of range for {self.count} locks")
+
+    def acquire(self, i: int, timeout=None):
+        """
+        Try to acquire lock i. Returns True on success, False on timeout.
+        """
+        self._check_index(i)
+        deadline = _deadline_ns(timeout)
+        robust = self._robust
+        self._in_flight.append(None)
+        try:
+            got = self._acquire(self._base_addr, LOCK_SIZE, i, SPIN_BUDGET, deadline, robust)
+            while got == _ACQUIRE_AGAIN:
+                got = self._acquire(self._base_addr, LOCK_SIZE, i, SPIN_BUDGET, deadline, robust)
+        finally:
+            self._in_flight.pop()
+        if got:
+            self._held[i] = got
+        return bool(got)
+
+    def release(self, i: int):
+        """Release lock i and wake one of its sleeping waiters."""
+        self._check_index(i)
+        if not self._release(self._base_addr, LOCK_SIZE, i):
+            raise RuntimeError(f"Lock {i} in {self.shm_path} is not held by this process")
+        self._held[i] = 0
+
+    def is_locked(self, i: int):
+        """Check if the flag of lock i is nonzero (atomic acquire load)."""
+        self._check_index(i)
+        return bool(self._load(self._base_addr, LOCK_SIZE, i))
+
+    def owner_died(self, i: int):
+        """True while this object holds lock i after taking it over from a dead holder."""
+        self._check_index(i)
+        return self._held[i] == _ACQUIRE_OWNER_DEAD
+
+    def __len__(self):
+        return self.count
@@ -0,0 +1,57 @@
+"""
+ctypes bindings of the lock primitives that Numba can call from nopython code.
+
+Numba compiles calls to ctypes functions into direct native calls, so these work inside
+@njit (including parallel loops) without dropping back to the interpreter. Addresses are
+declared as c_size_t rather than c_void_p so that plain integers, e.g. ShmLock.ptr_addr,
+type-check in Numba. numba itself is not imported here; install it separately.
+
+    from numba import njit
+    from shm_ipc_lock import ShmLock
+    from shm_ipc_lock.numba_binding import acquire, release, SPIN_BUDGET
+
+    @njit(nogil=True)
+    def critical(addr):
+        while acquire(addr, SPIN_BUDGET, 0, 0) < 0:
+            pass
+        ...
+        release(addr)
+
+    lock = ShmLock("/dev/shm/myregion")
+    critical(lock.ptr_addr)
+
+The address is only valid while its ShmLock is open: keep the object referenced for as long
+as compiled code may use the address, since closing or collecting it unmaps the region.
+
+Locks taken here follow the same ownership rules as ShmLock, so either side may release
+them. Use nogil=True for code that may block in acquire, so other threads keep running.
+acquire(addr, max_spins, deadline_ns, robust) returns 1 on success, 0 on timeout and -1
+when a parked wait was interrupted by a signal or its owner poll ran out; nopython code
+cannot handle signals, so it just retries. With robust nonzero it may also return 2: the
+lock was taken over from a dead holder (see ShmLock's robust for the caveats).
+"""
+
+import ctypes
+
+from .ipc_lock import SPIN_BUDGET, _atomic, build_c_shared_lib
+
+# The extension exports the same C symbols as the runtime-built library
+_lib = ctypes.CDLL(_atomic.__file__ if _atomic is not None else build_c_shared_lib())
+
+try_acquire = _lib.try_lock_u8
+try_acquire.argtypes = (ctypes.c_size_t,)
+try_acquire.restype = ctypes.c_int
+
+acquire = _lib.acquire_u8
+acquire.argtypes = (ctypes.c_size_t, ctypes.c_uint32, ctypes.c_uint64, ctypes.c_int)
+acquire.restype = ctypes.c_int
+
+release = _lib.release_u8
+release.argtypes = (ctypes.c_size_t,)
+release.restype = ctypes.c_int
+
+is_locked = _lib.load_u8
+is_locked.argtypes = (ctypes.c_size_t,)
+is_locked.restype = ctypes.c_uint8
+
+__all__ = ["SPIN_BUDGET", "acquire", "is_locked", "release", "try_acquire"]
@@ -0,0 +1,26 @@
+"""
+Shared fixtures. Every lock test runs on both backends; the extension half needs the
+_atomic module built next to the sources (python setup.py build_ext --inplace) and is
+skipped otherwise.
+"""
+import shutil
+
+import pytest
+
+from shm_ipc_lock import build_c_shared_lib, ipc_lock
+
+@pytest.fixture(params=["extension", "ctypes"])
+def lock_kwargs(request):
+    """Constructor kwargs selecting the backend under test."""
+    if request.param == "extension":
+        if ipc_lock._atomic is None:
+            pytest.skip("_atomic extension not built (python setup.py build_ext --inplace)")
+        return {}
+    if shutil.which("gcc") is None:
+        pytest.skip("gcc not available to build the ctypes library")
+    return {"so_path": build_c_shared_lib()}
+
+@pytest.fixture
+def shm_path(tmp_path):
+    # Any MAP_SHARED file works; tmp_path keeps test regions out of /dev/shm
+    return str(tmp_path / "region")
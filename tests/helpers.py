@@ -0,0 +1,48 @@
+"""
+Helpers for tests that need other processes. Children are plain os.fork() processes that
+leave with os._exit(), so they never run pytest's own teardown.
+"""
+import os
+from contextlib import contextmanager
+
+from shm_ipc_lock import ShmLock
+
+def fork(fn):
+    """Run fn in a child process; its exit status is 0 if fn returned normally."""
+    pid = os.fork()
+    if pid == 0:
+        code = 1
+        try:
+            fn()
+            code = 0
+        finally:
+            os._exit(code)
+    return pid
+
+def wait(pid):
+    """Reap a child started by fork() and return its exit status (-1 if killed)."""
+    _, status = os.waitpid(pid, 0)
+    return os.WEXITSTATUS(status) if os.WIFEXITED(status) else -1
+
+@contextmanager
+def held_by_child(shm_path, lock_kwargs):
+    """Hold the lock at offset 0 in a child process for the duration of the block."""
+    ready_r, ready_w = os.pipe()
+    done_r, done_w = os.pipe()
+
+    def hold():
+        lock = ShmLock(shm_path, **lock_kwargs)
+        lock.acquire()
+        os.write(ready_w, b"1")
+        os.read(done_r, 1)
+        lock.release()
+
+    pid = fork(hold)
+    try:
+        assert os.read(ready_r, 1) == b"1"
+        yield pid
+    finally:
+        os.write(done_w, b"1")
+        assert wait(pid) == 0
+        for fd in (ready_r, ready_w, done_r, done_w):
+            os.close(fd)
@@ -0,0 +1,33 @@
+"""
+The spin -> sched_yield -> futex backoff: a waiter parked in futex still returns to Python
+for signals, so an untimed acquire can be interrupted.
+"""
+import signal
+import time
+
+import pytest
+
+from helpers import held_by_child
+from shm_ipc_lock import ShmLock
+
+class _Interrupted(Exception):
+    pass
+
+def test_untimed_acquire_is_interruptible(shm_path, lock_kwargs):
+    def interrupt(signum, frame):
+        raise _Interrupted
+
+    lock = ShmLock(shm_path, **lock_kwargs)
+    previous = signal.signal(signal.SIGALRM, interrupt)
+    try:
+        with held_by_child(shm_path, lock_kwargs):
+            signal.setitimer(signal.ITIMER_REAL, 0.2)
+            start = time.monotonic()
+            with pytest.raises(_Interrupted):
+                lock.acquire()
+            assert time.monotonic() - start < 1.0
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+    assert lock.acquire(timeout=1.0)
+    lock.release()
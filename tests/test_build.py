@@ -0,0 +1,33 @@
+"""
+The runtime-built ctypes library: cached on disk by content hash, and keyed, built and
+loaded at most once per process.
+"""
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from shm_ipc_lock import ShmLock, build_c_shared_lib
+
+pytestmark = pytest.mark.skipif(shutil.which("gcc") is None, reason="gcc not available")
+
+def test_build_is_cached_on_disk(tmp_path, monkeypatch):
+    so_path = build_c_shared_lib(str(tmp_path))
+    assert os.path.dirname(so_path) == str(tmp_path)
+    assert os.path.exists(so_path)
+    assert not [name for name in os.listdir(tmp_path) if name.endswith((".c", ".tmp"))]
+
+    def no_subprocess(*args, **kwargs):
+        raise AssertionError("gcc must not run again")
+
+    # Neither the cache key (gcc --version) nor the build runs again in this process
+    monkeypatch.setattr(subprocess, "check_output", no_subprocess)
+    monkeypatch.setattr(subprocess, "check_call", no_subprocess)
+    assert build_c_shared_lib(str(tmp_path)) == so_path
+
+def test_library_loaded_once_per_process(shm_path):
+    so_path = build_c_shared_lib()
+    first = ShmLock(shm_path, so_path=so_path)
+    second = ShmLock(shm_path, so_path=so_path)
+    assert first.lib is second.lib
@@ -0,0 +1,50 @@
+"""
+close(): later calls raise instead of touching the unmapped region, and the region is not
+unmapped under an acquire() blocked in another thread.
+"""
+import threading
+import time
+
+import pytest
+
+from helpers import held_by_child
+from shm_ipc_lock import ShmLock, ShmLockSet
+
+def test_closed_lock_raises(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    lock.close()
+    lock.close()
+    for call in (lock.acquire, lock.release, lock.is_locked, lock.__enter__):
+        with pytest.raises(ValueError, match="lock is closed"):
+            call()
+
+def test_close_refused_while_acquire_blocked(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(lock.acquire(timeout=5.0)))
+    with held_by_child(shm_path, lock_kwargs):
+        waiter.start()
+        time.sleep(0.2)  # let the waiter park in C
+        with pytest.raises(RuntimeError, match="blocked in acquire"):
+            lock.close()
+        assert lock.is_locked()
+    waiter.join()
+    assert results == [True]
+    lock.release()
+    lock.close()
+    assert not ShmLock(shm_path, **lock_kwargs).is_locked()
+
+def test_lock_set_close_refused_while_acquire_blocked(shm_path, lock_kwargs):
+    locks = ShmLockSet(shm_path, 2, **lock_kwargs)
+    other = ShmLockSet(shm_path, 2, **lock_kwargs)
+    locks.acquire(1)
+    # Same-process lock held through another handle: the waiter blocks until it is released
+    waiter = threading.Thread(target=lambda: other.acquire(1, timeout=5.0))
+    waiter.start()
+    time.sleep(0.2)
+    with pytest.raises(RuntimeError, match="blocked in acquire"):
+        other.close()
+    locks.release(1)
+    waiter.join()
+    other.close()
+    assert not locks.is_locked(1)
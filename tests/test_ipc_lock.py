@@ -0,0 +1,65 @@
+"""
+Core ShmLock behaviour: acquire/release, timeouts, offsets and mutual exclusion between
+processes, on both backends.
+"""
+import mmap
+import os
+import struct
+import time
+
+import pytest
+
+from helpers import fork, held_by_child, wait
+from shm_ipc_lock import LOCK_SIZE, ShmLock
+
+def test_acquire_release(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    assert not lock.is_locked()
+    assert lock.acquire()
+    assert lock.is_locked()
+    lock.release()
+    assert not lock.is_locked()
+    with lock:
+        assert lock.is_locked()
+    assert not lock.is_locked()
+    lock.close()
+
+def test_acquire_timeout(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    with held_by_child(shm_path, lock_kwargs):
+        start = time.monotonic()
+        assert not lock.acquire(timeout=0.2)
+        assert 0.2 <= time.monotonic() - start < 2.0
+        assert not lock.acquire(timeout=1e-12)
+    assert lock.acquire(timeout=1.0)
+    lock.release()
+
+def test_unaligned_offset_rejected(shm_path, lock_kwargs):
+    with pytest.raises(ValueError, match="aligned_offset"):
+        ShmLock(shm_path, offset=8, **lock_kwargs)
+    assert ShmLock.aligned_offset(8) == LOCK_SIZE
+
+@pytest.mark.parametrize("exchange", [False, True], ids=["cas", "xchg"])
+def test_cross_process_counter(shm_path, lock_kwargs, exchange):
+    workers, rounds = 4, 2000
+    counter_offset = LOCK_SIZE
+    fd = os.open(shm_path, os.O_RDWR | os.O_CREAT, 0o600)
+    os.ftruncate(fd, counter_offset + 8)
+    os.close(fd)
+
+    def work():
+        lock = ShmLock(shm_path, create=False, exchange=exchange, **lock_kwargs)
+        with open(shm_path, "r+b") as f:
+            mm = mmap.mmap(f.fileno(), counter_offset + 8)
+        for _ in range(rounds):
+            with lock:
+                # Non-atomic read-modify-write: loses updates without mutual exclusion
+                (value,) = struct.unpack_from("q", mm, counter_offset)
+                struct.pack_into("q", mm, counter_offset, value + 1)
+
+    pids = [fork(work) for _ in range(workers)]
+    assert [wait(pid) for pid in pids] == [0] * workers
+    with open(shm_path, "rb") as f:
+        f.seek(counter_offset)
+        assert struct.unpack("q", f.read(8))[0] == workers * rounds
+    assert not ShmLock(shm_path, **lock_kwargs).is_locked()
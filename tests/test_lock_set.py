@@ -0,0 +1,58 @@
+"""
+ShmLockSet: independent cache-line locks in one region, sharing ShmLock's ownership rules.
+"""
+import gc
+import os
+
+import pytest
+
+from helpers import fork, wait
+from shm_ipc_lock import ShmLockSet
+
+@pytest.mark.parametrize("exchange", [False, True], ids=["cas", "xchg"])
+def test_lock_set(shm_path, lock_kwargs, exchange):
+    locks = ShmLockSet(shm_path, 4, exchange=exchange, **lock_kwargs)
+    assert len(locks) == 4
+    assert locks.acquire(1)
+    assert locks.is_locked(1)
+    assert not locks.is_locked(0)
+    # A held lock times out through another handle too (the locks are not reentrant)
+    other = ShmLockSet(shm_path, 4, exchange=exchange, **lock_kwargs)
+    assert not other.acquire(1, timeout=0.05)
+    other.close()
+    assert locks.acquire(2, timeout=0.1)
+    locks.release(1)
+    assert not locks.is_locked(1)
+    with pytest.raises(IndexError):
+        locks.acquire(4)
+    with pytest.raises(RuntimeError, match="not held"):
+        locks.release(3)
+    with pytest.raises(ValueError):
+        ShmLockSet(shm_path, 0, **lock_kwargs)
+
+    # Another handle on the same set leaves lock 2 alone; closing the holder releases it
+    ShmLockSet(shm_path, 4, **lock_kwargs).close()
+    gc.collect()
+    assert locks.is_locked(2)
+    locks.close()
+    assert not ShmLockSet(shm_path, 4, **lock_kwargs).is_locked(2)
+    with pytest.raises(ValueError, match="lock is closed"):
+        locks.acquire(0)
+
+def test_lock_set_locks_are_independent(shm_path, lock_kwargs):
+    locks = ShmLockSet(shm_path, 2, robust=True, **lock_kwargs)
+
+    def hold_first():
+        child = ShmLockSet(shm_path, 2, **lock_kwargs)
+        child.acquire(0)
+        os._exit(0)
+
+    assert wait(fork(hold_first)) == 0
+    assert locks.is_locked(0)
+    assert locks.acquire(1, timeout=0.1)
+    # Lock 0 belonged to the exited child and is taken over
+    assert locks.acquire(0, timeout=5.0)
+    assert locks.owner_died(0)
+    assert not locks.owner_died(1)
+    locks.release(0)
+    locks.release(1)
@@ -0,0 +1,62 @@
+"""
+shm_ipc_lock.numba_binding: the ctypes functions are called directly here, so most tests
+need no numba; the @njit smoke test runs only when numba is installed.
+"""
+import time
+
+import pytest
+
+from helpers import held_by_child
+from shm_ipc_lock import ShmLock
+from shm_ipc_lock.numba_binding import SPIN_BUDGET, acquire, is_locked, release, try_acquire
+
+def _acquire(addr, deadline_ns):
+    got = acquire(addr, SPIN_BUDGET, deadline_ns, 0)
+    while got < 0:
+        got = acquire(addr, SPIN_BUDGET, deadline_ns, 0)
+    return got
+
+def test_try_acquire_release(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    assert try_acquire(lock.ptr_addr) == 1
+    assert lock.is_locked()
+    assert is_locked(lock.ptr_addr) == 1
+    assert try_acquire(lock.ptr_addr) == 0
+    assert release(lock.ptr_addr) == 1
+    assert not lock.is_locked()
+    assert release(lock.ptr_addr) == 0
+
+def test_shared_ownership_with_shm_lock(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    assert _acquire(lock.ptr_addr, 0) == 1
+    lock.release()
+    lock.acquire()
+    assert release(lock.ptr_addr) == 1
+    assert not lock.is_locked()
+
+def test_acquire_deadline(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    with held_by_child(shm_path, lock_kwargs):
+        start = time.monotonic()
+        assert _acquire(lock.ptr_addr, time.monotonic_ns() + 100_000_000) == 0
+        assert time.monotonic() - start >= 0.1
+        assert release(lock.ptr_addr) == 0
+    assert _acquire(lock.ptr_addr, time.monotonic_ns() + 1_000_000_000) == 1
+    assert release(lock.ptr_addr) == 1
+
+def test_njit_critical_section(shm_path, lock_kwargs):
+    numba = pytest.importorskip("numba")
+
+    @numba.njit(nogil=True)
+    def critical(addr, rounds):
+        done = 0
+        for _ in range(rounds):
+            while acquire(addr, SPIN_BUDGET, 0, 0) < 0:
+                pass
+            done += is_locked(addr)
+            release(addr)
+        return done
+
+    lock = ShmLock(shm_path, **lock_kwargs)
+    assert critical(lock.ptr_addr, 1000) == 1000
+    assert not lock.is_locked()
@@ -0,0 +1,102 @@
+"""
+Per-process ownership: release() from another process, opt-in takeover of a dead holder's
+lock, and release on close/GC only by the object the lock was acquired through.
+"""
+import gc
+import os
+import shutil
+import subprocess
+import sys
+import time
+
+import pytest
+
+from helpers import fork, held_by_child, wait
+from shm_ipc_lock import ShmLock
+
+def _die_holding(shm_path, lock_kwargs):
+    def die_holding():
+        lock = ShmLock(shm_path, **lock_kwargs)
+        lock.acquire()
+        os._exit(0)  # no release, close or finalizer
+
+    assert wait(fork(die_holding)) == 0
+
+def test_robust_takeover_after_holder_exits(shm_path, lock_kwargs):
+    _die_holding(shm_path, lock_kwargs)
+    lock = ShmLock(shm_path, robust=True, **lock_kwargs)
+    assert lock.is_locked()
+    assert lock.acquire(timeout=5.0)
+    assert lock.owner_died
+    lock.release()
+    assert not lock.owner_died
+    assert not lock.is_locked()
+    assert lock.acquire(timeout=1.0)
+    assert not lock.owner_died
+    lock.release()
+
+def test_dead_holder_keeps_lock_without_robust(shm_path, lock_kwargs):
+    _die_holding(shm_path, lock_kwargs)
+    lock = ShmLock(shm_path, **lock_kwargs)
+    assert not lock.acquire(timeout=0.3)
+    with pytest.raises(RuntimeError, match="not held"):
+        lock.release()
+    assert lock.is_locked()
+
+def test_holder_in_other_pid_namespace_keeps_lock(shm_path, lock_kwargs):
+    unshare = shutil.which("unshare")
+    holder = (
+        "import sys, time; from shm_ipc_lock import ShmLock\n"
+        "lock = ShmLock(sys.argv[1], so_path=sys.argv[2] or None)\n"
+        "lock.acquire(); print('held', flush=True); sys.stdin.read(); lock.release()\n"
+    )
+    cmd = [unshare or "unshare", "--pid", "--fork", sys.executable, "-c", holder, shm_path,
+           lock_kwargs.get("so_path", "")]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    try:
+        proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE, env=env)
+    except OSError:
+        pytest.skip("unshare not available")
+    try:
+        if proc.stdout.readline() != b"held\n":
+            pytest.skip("cannot create a pid namespace here")
+        # The holder's pid does not exist in this namespace, yet it is alive: without
+        # robust, the waiter must not mistake it for a dead holder
+        lock = ShmLock(shm_path, **lock_kwargs)
+        start = time.monotonic()
+        assert not lock.acquire(timeout=0.3)
+        assert time.monotonic() - start >= 0.3
+    finally:
+        proc.communicate(b"")
+    assert proc.returncode == 0
+
+def test_release_by_non_owner_raises(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    with pytest.raises(RuntimeError, match="not held"):
+        lock.release()
+    with held_by_child(shm_path, lock_kwargs):
+        with pytest.raises(RuntimeError, match="not held"):
+            lock.release()
+        assert lock.is_locked()
+
+def test_other_handle_gc_keeps_lock(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    lock.acquire()
+    assert ShmLock(shm_path, **lock_kwargs).is_locked()
+    other = ShmLock(shm_path, **lock_kwargs)
+    other.close()
+    gc.collect()
+    assert lock.is_locked()
+    lock.release()
+
+def test_close_and_gc_release_held_lock(shm_path, lock_kwargs):
+    lock = ShmLock(shm_path, **lock_kwargs)
+    lock.acquire()
+    lock.close()
+    assert not ShmLock(shm_path, **lock_kwargs).is_locked()
+
+    lock = ShmLock(shm_path, **lock_kwargs)
+    lock.acquire()
+    del lock
+    gc.collect()
+    assert not ShmLock(shm_path, **lock_kwargs).is_locked()